@@ -1,36 +1,48 @@
 """
 Custom Algorithm for NYC Taxi Data Explorer
 --------------------------------------------
-Implements a linear top-k selection without using built-in sort functions.
+Implements a bounded min-heap top-k selection without using built-in sort functions.
 
-Used in /api/top-expensive to return the k highest-fare trips.
+Kept as a reference implementation; not used by the API, where /api/top-expensive
+lets SQLite walk idx_trips_fare with ORDER BY fare_amount DESC LIMIT k instead.
 """
 
+import heapq
+
 
 def top_k_fares(trips, k=10):
     """
-    Linear Top-K Selection
-    -----------------------
-    Finds the k most expensive trips by scanning the list once per result slot.
+    Bounded Min-Heap Top-K Selection
+    ---------------------------------
+    Finds the k most expensive trips in a single pass over the list.
 
     How it works:
-    1. Start with an empty result list
-    2. For each of the k slots, scan all remaining trips and pick the highest fare
-    3. Remove the picked trip so it is not selected again
-    4. Repeat until k trips are collected
+    1. Keep a min-heap of at most k (fare, index, trip) entries
+    2. While the heap has fewer than k entries, push every trip
+    3. After that, push-pop each trip: the cheapest entry falls out,
+       so the heap always holds the k highest fares seen so far
+    4. Pop the heap into the result from cheapest to dearest, then
+       fill the result back-to-front so it ends up highest fare first
+
+    The index breaks fare ties so two trip dicts are never compared.
 
-    Time Complexity:  O(n * k)  — n trips scanned for each of the k slots
-    Space Complexity: O(n + k)  — copy of trips list + result list
+    Time Complexity:  O(n log k)  — one heap operation per trip
+    Space Complexity: O(k)        — heap + result list
     """
-    remaining = list(trips)
-    result = []
-
-    for _ in range(min(k, len(remaining))):
-        max_idx = 0
-        for i in range(1, len(remaining)):
-            if remaining[i]["fare_amount"] > remaining[max_idx]["fare_amount"]:
-                max_idx = i
-        result.append(remaining[max_idx])
-        remaining.pop(max_idx)
+    if k <= 0:
+        return []
+
+    heap = []
+    for i, trip in enumerate(trips):
+        # Negate the index so that, on equal fares, earlier trips are kept
+        entry = (trip["fare_amount"], -i, trip)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+
+    result = [None] * len(heap)
+    for slot in range(len(heap) - 1, -1, -1):
+        result[slot] = heapq.heappop(heap)[2]
 
     return result
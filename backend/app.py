@@ -15,20 +15,57 @@ Endpoints:
 - GET /api/payment-analysis    -> Payment type breakdown
 - GET /api/weekday-vs-weekend  -> Weekday vs weekend comparison
 - GET /api/search              -> Filter trips by zone name
-- GET /api/top-expensive       -> Top k trips by fare (uses custom algorithm)
+- GET /api/top-expensive       -> Top k trips by fare (ORDER BY ... LIMIT k)
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, request, send_from_directory
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_caching import Cache
+from collections import defaultdict
 import os
-import json
+import re
+import threading
+import orjson
 
 from db import get_db
-from algorithm import top_k_fares
 
 app = Flask(__name__)
 CORS(app)
 
+# gzip/brotli JSON responses; the zones GeoJSON alone is several MB raw
+app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+app.config["COMPRESS_LEVEL"] = 5
+Compress(app)
+
+# The dataset is static between loads, so parameterless aggregate
+# endpoints are cached in-process and every API response carries an ETag
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache"})
+CACHE_TIMEOUT = 3600
+
+# Upper bound on /api/top-expensive?k=
+MAX_TOP_K = 1000
+
+
+@app.after_request
+def add_etag(response):
+    """Tag successful API responses and answer If-None-Match with 304."""
+    if (
+        request.method == "GET"
+        and request.path.startswith("/api/")
+        and response.status_code == 200
+        and not response.direct_passthrough
+    ):
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+def ojsonify(obj):
+    """jsonify() replacement that encodes with orjson's C serializer."""
+    return Response(orjson.dumps(obj), mimetype="application/json")
+
+
 # Serve frontend files
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend")
 
@@ -43,52 +80,64 @@ def serve_static(filename):
     return send_from_directory(FRONTEND_DIR, filename)
 
 
+# =========================================================
+#  ZONE CACHE
+# =========================================================
+
+# taxi_zones is ~265 static rows, so it is read once per process and
+# zone names are resolved in Python instead of JOINed on every request.
+# Both maps are built in locals and published whole under the lock, so a
+# concurrent request never sees a half-filled cache.
+ZONES = None
+BOROUGH_ZONES = None
+_zones_lock = threading.Lock()
+
+
+def get_zones():
+    """Return the location_id -> zone row cache, loading it on first use."""
+    global ZONES, BOROUGH_ZONES
+    if ZONES is None:
+        with _zones_lock:
+            if ZONES is None:
+                zones = {}
+                borough_zones = defaultdict(list)
+                for row in get_db().execute("SELECT * FROM taxi_zones").fetchall():
+                    zones[row["location_id"]] = dict(row)
+                    borough_zones[row["borough"]].append(row["location_id"])
+                # BOROUGH_ZONES first: readers check ZONES to know both are ready
+                BOROUGH_ZONES = dict(borough_zones)
+                ZONES = zones
+    return ZONES
+
+
+def zone_info(location_id):
+    """Return (zone_name, borough) for a location id, or (None, None) if unknown."""
+    zone = get_zones().get(location_id)
+    if zone is None:
+        return None, None
+    return zone["zone_name"], zone["borough"]
+
+
 # =========================================================
 #  API ENDPOINTS
 # =========================================================
 
 @app.route("/api/stats", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_stats():
     """Get overall dataset statistics."""
     conn = get_db()
-    stats = {}
-
-    row = conn.execute("SELECT COUNT(*) as cnt FROM trips").fetchone()
-    stats["total_trips"] = row["cnt"]
-
-    row = conn.execute(
-        """SELECT
-            AVG(trip_distance) as avg_distance,
-            AVG(trip_duration_minutes) as avg_duration,
-            AVG(fare_amount) as avg_fare,
-            AVG(speed_mph) as avg_speed,
-            AVG(tip_amount) as avg_tip,
-            AVG(total_amount) as avg_total,
-            SUM(total_amount) as total_revenue,
-            AVG(passenger_count) as avg_passengers
-        FROM trips"""
-    ).fetchone()
-    stats["avg_distance"] = round(row["avg_distance"], 2)
-    stats["avg_duration"] = round(row["avg_duration"], 2)
-    stats["avg_fare"] = round(row["avg_fare"], 2)
-    stats["avg_speed"] = round(row["avg_speed"], 2)
-    stats["avg_tip"] = round(row["avg_tip"], 2)
-    stats["avg_total"] = round(row["avg_total"], 2)
-    stats["total_revenue"] = round(row["total_revenue"], 2)
-    stats["avg_passengers"] = round(row["avg_passengers"], 2)
-
-    row = conn.execute(
-        "SELECT COUNT(DISTINCT pickup_location_id) as zones FROM trips"
-    ).fetchone()
-    stats["active_zones"] = row["zones"]
-
-    conn.close()
-    return jsonify(stats)
+    row = conn.execute("SELECT * FROM stats_cache").fetchone()
+    return ojsonify(dict(row))
 
 
 @app.route("/api/trips", methods=["GET"])
 def get_trips():
-    """Get paginated trips with optional filters."""
+    """
+    Get paginated trips with optional filters.
+    Pass cursor_dt/cursor_id (the previous response's next_cursor) to seek
+    straight to the next page instead of skipping rows with OFFSET.
+    """
     conn = get_db()
 
     page = int(request.args.get("page", 1))
@@ -101,10 +150,11 @@ def get_trips():
 
     borough = request.args.get("borough")
     if borough:
-        conditions.append(
-            "pickup_location_id IN (SELECT location_id FROM taxi_zones WHERE borough = ?)"
-        )
-        params.append(borough)
+        get_zones()
+        zone_ids = BOROUGH_ZONES.get(borough, [])
+        placeholders = ",".join("?" * len(zone_ids))
+        conditions.append(f"pickup_location_id IN ({placeholders})")
+        params.extend(zone_ids)
 
     min_fare = request.args.get("min_fare")
     if min_fare:
@@ -147,82 +197,76 @@ def get_trips():
     count_query = f"SELECT COUNT(*) as cnt FROM trips WHERE {where_clause}"
     total = conn.execute(count_query, params).fetchone()["cnt"]
 
-    # Get trips with zone names
+    # Keyset pagination: seek past the last row of the previous page
+    cursor_dt = request.args.get("cursor_dt")
+    cursor_id = request.args.get("cursor_id")
+    if cursor_dt and cursor_id:
+        where_clause += " AND (t.pickup_datetime, t.trip_id) < (?, ?)"
+        params.extend([cursor_dt, int(cursor_id)])
+        offset = 0
+
+    # Get trips (only the columns the dashboard renders), then attach
+    # zone names from the in-process cache
     query = f"""
-        SELECT t.*,
-            pz.zone_name as pickup_zone, pz.borough as pickup_borough,
-            dz.zone_name as dropoff_zone, dz.borough as dropoff_borough
+        SELECT t.trip_id, t.pickup_datetime, t.fare_amount, t.trip_distance,
+            t.trip_duration_minutes, t.speed_mph, t.tip_amount, t.total_amount,
+            t.passenger_count, t.pickup_hour, t.pickup_day_of_week, t.payment_type,
+            t.pickup_location_id, t.dropoff_location_id
         FROM trips t
-        LEFT JOIN taxi_zones pz ON t.pickup_location_id = pz.location_id
-        LEFT JOIN taxi_zones dz ON t.dropoff_location_id = dz.location_id
         WHERE {where_clause}
-        ORDER BY t.pickup_datetime DESC
+        ORDER BY t.pickup_datetime DESC, t.trip_id DESC
         LIMIT ? OFFSET ?
     """
     params.extend([per_page, offset])
-    rows = conn.execute(query, params).fetchall()
 
-    trips = [dict(row) for row in rows]
-    conn.close()
+    # Fetch plain tuples and zip them with the column names once, rather
+    # than paying sqlite3.Row's per-field name lookups in dict(row)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(query, params).fetchall()
+    cols = [c[0] for c in cursor.description]
 
-    return jsonify(
+    trips = []
+    for row in rows:
+        trip = dict(zip(cols, row))
+        trip["pickup_zone"], trip["pickup_borough"] = zone_info(trip["pickup_location_id"])
+        trip["dropoff_zone"], trip["dropoff_borough"] = zone_info(trip["dropoff_location_id"])
+        trips.append(trip)
+
+    next_cursor = None
+    if len(trips) == per_page:
+        last = trips[-1]
+        next_cursor = {"cursor_dt": last["pickup_datetime"], "cursor_id": last["trip_id"]}
+
+    return ojsonify(
         {
             "trips": trips,
             "total": total,
             "page": page,
             "per_page": per_page,
             "total_pages": (total + per_page - 1) // per_page,
+            "next_cursor": next_cursor,
         }
     )
 
 
 @app.route("/api/hourly", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_hourly():
     """Trip counts and average fare by hour of day."""
     conn = get_db()
-    rows = conn.execute(
-        """SELECT pickup_hour as hour,
-            COUNT(*) as trip_count,
-            AVG(fare_amount) as avg_fare,
-            AVG(trip_duration_minutes) as avg_duration,
-            AVG(speed_mph) as avg_speed,
-            AVG(tip_amount) as avg_tip
-        FROM trips
-        GROUP BY pickup_hour
-        ORDER BY pickup_hour"""
-    ).fetchall()
-    conn.close()
-
-    data = []
-    for row in rows:
-        data.append(
-            {
-                "hour": row["hour"],
-                "trip_count": row["trip_count"],
-                "avg_fare": round(row["avg_fare"], 2),
-                "avg_duration": round(row["avg_duration"], 2),
-                "avg_speed": round(row["avg_speed"], 2),
-                "avg_tip": round(row["avg_tip"], 2),
-            }
-        )
-    return jsonify(data)
+    rows = conn.execute("SELECT * FROM hourly_agg ORDER BY hour").fetchall()
+    return ojsonify([dict(r) for r in rows])
 
 
 @app.route("/api/daily", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_daily():
     """Trip counts by day of the week."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT pickup_day_of_week as day,
-            COUNT(*) as trip_count,
-            AVG(fare_amount) as avg_fare,
-            AVG(trip_distance) as avg_distance,
-            SUM(CASE WHEN is_weekend = 1 THEN 1 ELSE 0 END) as weekend_trips
-        FROM trips
-        GROUP BY pickup_day_of_week
-        ORDER BY pickup_day_of_week"""
+        "SELECT day, trip_count, avg_fare, avg_distance FROM daily_agg ORDER BY day"
     ).fetchall()
-    conn.close()
 
     day_names = [
         "Monday",
@@ -233,55 +277,21 @@ def get_daily():
         "Saturday",
         "Sunday",
     ]
-    data = []
-    for row in rows:
-        data.append(
-            {
-                "day": row["day"],
-                "day_name": day_names[row["day"]],
-                "trip_count": row["trip_count"],
-                "avg_fare": round(row["avg_fare"], 2),
-                "avg_distance": round(row["avg_distance"], 2),
-            }
-        )
-    return jsonify(data)
+    data = [dict(r) for r in rows]
+    for d in data:
+        d["day_name"] = day_names[d["day"]]
+    return ojsonify(data)
 
 
 @app.route("/api/boroughs", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_boroughs():
     """Trip stats grouped by pickup borough."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT z.borough,
-            COUNT(*) as trip_count,
-            AVG(t.fare_amount) as avg_fare,
-            AVG(t.trip_distance) as avg_distance,
-            AVG(t.trip_duration_minutes) as avg_duration,
-            AVG(t.speed_mph) as avg_speed,
-            AVG(t.tip_amount) as avg_tip,
-            SUM(t.total_amount) as total_revenue
-        FROM trips t
-        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
-        GROUP BY z.borough
-        ORDER BY trip_count DESC"""
+        "SELECT * FROM borough_agg ORDER BY trip_count DESC"
     ).fetchall()
-    conn.close()
-
-    data = []
-    for row in rows:
-        data.append(
-            {
-                "borough": row["borough"],
-                "trip_count": row["trip_count"],
-                "avg_fare": round(row["avg_fare"], 2),
-                "avg_distance": round(row["avg_distance"], 2),
-                "avg_duration": round(row["avg_duration"], 2),
-                "avg_speed": round(row["avg_speed"], 2),
-                "avg_tip": round(row["avg_tip"], 2),
-                "total_revenue": round(row["total_revenue"], 2),
-            }
-        )
-    return jsonify(data)
+    return ojsonify([dict(r) for r in rows])
 
 
 @app.route("/api/top-zones", methods=["GET"])
@@ -292,52 +302,58 @@ def get_top_zones():
 
     # Top pickup zones
     pickup_rows = conn.execute(
-        """SELECT z.zone_name, z.borough, COUNT(*) as trip_count
-        FROM trips t
-        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
-        GROUP BY t.pickup_location_id
-        ORDER BY trip_count DESC
-        LIMIT ?""",
-        (limit,),
+        """SELECT pickup_location_id as location_id, COUNT(*) as trip_count
+        FROM trips
+        GROUP BY pickup_location_id
+        ORDER BY trip_count DESC"""
     ).fetchall()
 
     # Top dropoff zones
     dropoff_rows = conn.execute(
-        """SELECT z.zone_name, z.borough, COUNT(*) as trip_count
-        FROM trips t
-        JOIN taxi_zones z ON t.dropoff_location_id = z.location_id
-        GROUP BY t.dropoff_location_id
-        ORDER BY trip_count DESC
-        LIMIT ?""",
-        (limit,),
+        """SELECT dropoff_location_id as location_id, COUNT(*) as trip_count
+        FROM trips
+        GROUP BY dropoff_location_id
+        ORDER BY trip_count DESC"""
     ).fetchall()
 
-    conn.close()
-
-    return jsonify(
+    # At most ~265 grouped rows: skip ids missing from taxi_zones (as the
+    # old inner JOIN did) and apply the limit here rather than in SQL.
+    zones = get_zones()
+
+    def with_names(rows):
+        data = []
+        for r in rows:
+            if len(data) >= limit:
+                break
+            zone = zones.get(r["location_id"])
+            if zone is None:
+                continue
+            data.append(
+                {
+                    "zone_name": zone["zone_name"],
+                    "borough": zone["borough"],
+                    "trip_count": r["trip_count"],
+                }
+            )
+        return data
+
+    return ojsonify(
         {
-            "top_pickup": [dict(r) for r in pickup_rows],
-            "top_dropoff": [dict(r) for r in dropoff_rows],
+            "top_pickup": with_names(pickup_rows),
+            "top_dropoff": with_names(dropoff_rows),
         }
     )
 
 
 @app.route("/api/fare-distribution", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_fare_distribution():
     """Fare amount distribution buckets, ordered by fare range."""
     conn = get_db()
 
     rows = conn.execute(
-        """SELECT
-            CAST(fare_amount / 5 AS INT) * 5 as bucket_start,
-            COUNT(*) as count,
-            AVG(fare_amount) as avg_fare
-        FROM trips
-        WHERE fare_amount > 0 AND fare_amount <= 100
-        GROUP BY CAST(fare_amount / 5 AS INT)
-        ORDER BY bucket_start"""
+        "SELECT * FROM fare_dist_agg ORDER BY bucket_start"
     ).fetchall()
-    conn.close()
 
     data = []
     for row in rows:
@@ -345,97 +361,110 @@ def get_fare_distribution():
         data.append({
             "range": f"${start}-${start + 5}",
             "count": row["count"],
-            "avg_fare": round(row["avg_fare"], 2),
+            "avg_fare": row["avg_fare"],
         })
 
-    return jsonify(data)
+    return ojsonify(data)
+
+
+# The zones FeatureCollection is encoded once at load time (static_json);
+# it is read from the database once per process and served as raw bytes.
+GEOJSON_BYTES = None
+EMPTY_GEOJSON = b'{"type":"FeatureCollection","features":[]}'
+
+
+def get_geojson_bytes():
+    """Return the pre-encoded zones FeatureCollection, reading it on first use."""
+    global GEOJSON_BYTES
+    if GEOJSON_BYTES is None:
+        row = get_db().execute(
+            "SELECT body FROM static_json WHERE name = 'zones_geojson'"
+        ).fetchone()
+        if row is None:
+            # Not loaded yet; don't memoize so a later load is picked up
+            return EMPTY_GEOJSON
+        GEOJSON_BYTES = bytes(row["body"])
+    return GEOJSON_BYTES
 
 
 @app.route("/api/zones/geojson", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT,
+              response_filter=lambda resp: resp.get_data() != EMPTY_GEOJSON)
 def get_zones_geojson():
     """Get GeoJSON for all taxi zones (for map rendering)."""
-    conn = get_db()
-    rows = conn.execute(
-        """SELECT g.location_id, g.geometry_json, z.zone_name, z.borough, z.service_zone
-        FROM taxi_zone_geometries g
-        JOIN taxi_zones z ON g.location_id = z.location_id"""
-    ).fetchall()
-
-    features = []
-    for row in rows:
-        feature = {
-            "type": "Feature",
-            "properties": {
-                "location_id": row["location_id"],
-                "zone_name": row["zone_name"],
-                "borough": row["borough"],
-                "service_zone": row["service_zone"],
-            },
-            "geometry": json.loads(row["geometry_json"]),
-        }
-        features.append(feature)
-
-    conn.close()
-    return jsonify({"type": "FeatureCollection", "features": features})
+    body = get_geojson_bytes()
+    cache_control = "no-cache" if body is EMPTY_GEOJSON else "public, max-age=86400"
+    return Response(
+        body,
+        mimetype="application/json",
+        headers={"Cache-Control": cache_control},
+    )
 
 
 @app.route("/api/zone-heatmap", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_zone_heatmap():
     """Pickup counts per zone for heatmap visualization."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT t.pickup_location_id as location_id,
-            z.zone_name, z.borough,
+        """SELECT pickup_location_id as location_id,
             COUNT(*) as pickup_count,
-            AVG(t.fare_amount) as avg_fare
-        FROM trips t
-        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
-        GROUP BY t.pickup_location_id
+            ROUND(AVG(fare_amount), 2) as avg_fare
+        FROM trips
+        GROUP BY pickup_location_id
         ORDER BY pickup_count DESC"""
     ).fetchall()
-    conn.close()
 
+    zones = get_zones()
     data = []
     for row in rows:
+        zone = zones.get(row["location_id"])
+        if zone is None:
+            continue
         data.append(
             {
                 "location_id": row["location_id"],
-                "zone_name": row["zone_name"],
-                "borough": row["borough"],
+                "zone_name": zone["zone_name"],
+                "borough": zone["borough"],
                 "pickup_count": row["pickup_count"],
-                "avg_fare": round(row["avg_fare"], 2),
+                "avg_fare": row["avg_fare"],
             }
         )
-    return jsonify(data)
+    return ojsonify(data)
 
 
 @app.route("/api/speed-analysis", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_speed_analysis():
     """Speed patterns by hour and borough."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT z.borough, t.pickup_hour as hour,
-            AVG(t.speed_mph) as avg_speed,
-            COUNT(*) as trip_count
-        FROM trips t
-        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
-        WHERE z.borough IN ('Manhattan', 'Brooklyn', 'Queens', 'Bronx')
-        GROUP BY z.borough, t.pickup_hour
-        ORDER BY z.borough, t.pickup_hour"""
+        "SELECT * FROM speed_agg ORDER BY borough, hour"
     ).fetchall()
-    conn.close()
 
-    data = [dict(r) for r in rows]
-    for d in data:
-        d["avg_speed"] = round(d["avg_speed"], 2)
-    return jsonify(data)
+    return ojsonify([dict(r) for r in rows])
+
+
+def match_zone_ids(text):
+    """
+    Return location ids whose zone name matches every word in text as a prefix,
+    e.g. "times sq" -> "times"* "sq"*, using the zone_fts index.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return []
+    fts_query = " ".join(f'"{w}"*' for w in words)
+    rows = get_db().execute(
+        "SELECT rowid FROM zone_fts WHERE zone_fts MATCH ?", (fts_query,)
+    ).fetchall()
+    return [r[0] for r in rows]
 
 
 @app.route("/api/search", methods=["GET"])
 def search_trips():
     """
-    Search/filter trips using custom bucket sort for results.
-    Allows searching by zone name and sorting results.
+    Search/filter trips by zone name, sorted ascending by sort_by.
+    Sorting is done by SQLite's ORDER BY rather than in Python.
     """
     conn = get_db()
     zone_query = request.args.get("zone", "")
@@ -449,66 +478,76 @@ def search_trips():
     if sort_by not in valid_sort_fields:
         sort_by = "fare_amount"
 
+    # Zone names come from the in-process cache instead of a JOIN
     query = """
         SELECT t.trip_id, t.fare_amount, t.trip_distance, t.trip_duration_minutes,
             t.speed_mph, t.total_amount, t.tip_amount, t.pickup_hour,
-            pz.zone_name as pickup_zone, pz.borough as pickup_borough,
-            dz.zone_name as dropoff_zone, dz.borough as dropoff_borough
+            t.pickup_location_id, t.dropoff_location_id
         FROM trips t
-        JOIN taxi_zones pz ON t.pickup_location_id = pz.location_id
-        JOIN taxi_zones dz ON t.dropoff_location_id = dz.location_id
     """
     params = []
 
     if zone_query:
-        query += " WHERE (pz.zone_name LIKE ? OR dz.zone_name LIKE ?)"
-        params.extend([f"%{zone_query}%", f"%{zone_query}%"])
+        # Resolve matching zones through the FTS index, then filter trips by id
+        zone_ids = match_zone_ids(zone_query)
+        placeholders = ",".join("?" * len(zone_ids))
+        query += (
+            f" WHERE (t.pickup_location_id IN ({placeholders})"
+            f" OR t.dropoff_location_id IN ({placeholders}))"
+        )
+        params.extend(zone_ids + zone_ids)
 
-    query += f" LIMIT {limit}"
+    # sort_by is whitelisted above, so it is safe to interpolate
+    query += f" ORDER BY t.{sort_by} LIMIT {limit}"
 
     rows = conn.execute(query, params).fetchall()
-    conn.close()
 
-    data = [dict(r) for r in rows]
+    zones = get_zones()
+    data = []
+    for r in rows:
+        trip = dict(r)
+        pu = trip.pop("pickup_location_id")
+        do = trip.pop("dropoff_location_id")
+        # Skip trips whose zones are not in taxi_zones, as the inner JOIN did
+        if pu not in zones or do not in zones:
+            continue
+        trip["pickup_zone"], trip["pickup_borough"] = zone_info(pu)
+        trip["dropoff_zone"], trip["dropoff_borough"] = zone_info(do)
+        data.append(trip)
 
-    return jsonify(data)
+    return ojsonify(data)
 
 
 @app.route("/api/top-expensive", methods=["GET"])
 def top_expensive():
-    """Return the k most expensive trips using the custom top-k algorithm."""
+    """Return the k most expensive trips, selected by SQLite via idx_trips_fare."""
     k = int(request.args.get("k", 10))
+    # SQLite treats a negative LIMIT as "no limit", so bound k both ways
+    if k <= 0:
+        return ojsonify([])
+    k = min(k, MAX_TOP_K)
 
     conn = get_db()
     rows = conn.execute(
         """SELECT trip_id, fare_amount, trip_distance, trip_duration_minutes,
                pickup_hour, pickup_location_id, dropoff_location_id
            FROM trips
-           LIMIT 1000"""
+           ORDER BY fare_amount DESC
+           LIMIT ?""",
+        (k,),
     ).fetchall()
-    conn.close()
-
-    trips = [dict(r) for r in rows]
-    result = top_k_fares(trips, k=k)
 
-    return jsonify(result)
+    return ojsonify([dict(r) for r in rows])
 
 
 @app.route("/api/payment-analysis", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def get_payment_analysis():
     """Payment type breakdown."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT payment_type,
-            COUNT(*) as trip_count,
-            AVG(fare_amount) as avg_fare,
-            AVG(tip_amount) as avg_tip,
-            SUM(total_amount) as total_revenue
-        FROM trips
-        GROUP BY payment_type
-        ORDER BY trip_count DESC"""
+        "SELECT * FROM payment_agg ORDER BY trip_count DESC"
     ).fetchall()
-    conn.close()
 
     payment_names = {
         1: "Credit Card",
@@ -519,44 +558,27 @@ def get_payment_analysis():
         6: "Voided",
     }
 
-    data = []
-    for row in rows:
-        pt = row["payment_type"]
-        data.append(
-            {
-                "payment_type": pt,
-                "payment_name": payment_names.get(pt, f"Type {pt}"),
-                "trip_count": row["trip_count"],
-                "avg_fare": round(row["avg_fare"], 2),
-                "avg_tip": round(row["avg_tip"], 2),
-                "total_revenue": round(row["total_revenue"], 2),
-            }
-        )
-    return jsonify(data)
+    data = [dict(r) for r in rows]
+    for d in data:
+        pt = d["payment_type"]
+        d["payment_name"] = payment_names.get(pt, f"Type {pt}")
+    return ojsonify(data)
 
 
 @app.route("/api/weekday-vs-weekend", methods=["GET"])
+@cache.cached(timeout=CACHE_TIMEOUT)
 def weekday_vs_weekend():
     """Compare weekday vs weekend trip patterns."""
     conn = get_db()
     rows = conn.execute(
-        """SELECT
-            CASE WHEN is_weekend = 1 THEN 'Weekend' ELSE 'Weekday' END as period,
-            COUNT(*) as trip_count,
-            AVG(fare_amount) as avg_fare,
-            AVG(trip_distance) as avg_distance,
-            AVG(trip_duration_minutes) as avg_duration,
-            AVG(speed_mph) as avg_speed,
-            AVG(tip_amount) as avg_tip
-        FROM trips
-        GROUP BY is_weekend"""
+        "SELECT * FROM weekday_weekend_agg ORDER BY period"
     ).fetchall()
-    conn.close()
 
-    return jsonify([dict(r) for r in rows])
+    return ojsonify([dict(r) for r in rows])
 
 
 if __name__ == "__main__":
     print("Starting NYC Taxi Data Explorer API...")
     print("API running at http://localhost:8080")
-    app.run(debug=True, port=8080)
+    # Development server only; use gunicorn in production (see README)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", port=8080)
@@ -5,13 +5,13 @@ Sets up the database, loads taxi zone and spatial data,
 then delegates trip processing to trip_pipeline.py.
 """
 
-import pandas as pd
 import sqlite3
 import os
-import json
 import time
 
 from trip_pipeline import clean_and_process_trips
+from load_data_to_sql import apply_bulk_pragmas, refresh_caches
+from zones import load_zone_lookup
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,22 +35,22 @@ def setup_database():
 def load_taxi_zones(conn):
     """Load taxi zone lookup data into the database."""
     print("Loading taxi zones...")
-    zones_path = os.path.join(DATA_DIR, "taxi_zone_lookup.csv")
-    zones_df = pd.read_csv(zones_path)
-
-    for _, row in zones_df.iterrows():
-        loc_id = int(row["LocationID"])
-        borough = str(row["Borough"]) if pd.notna(row["Borough"]) else "Unknown"
-        zone = str(row["Zone"]) if pd.notna(row["Zone"]) else "Unknown"
-        service = str(row["service_zone"]) if pd.notna(row["service_zone"]) else "Unknown"
-
-        conn.execute(
-            "INSERT OR REPLACE INTO taxi_zones (location_id, borough, zone_name, service_zone) VALUES (?, ?, ?, ?)",
-            (loc_id, borough, zone, service),
-        )
-
+    zones = load_zone_lookup()
+
+    # Fill/cast whole columns once instead of per-cell pd.notna checks
+    rows = list(
+        zones.astype({"LocationID": int}).fillna("Unknown").itertuples(index=False, name=None)
+    )
+
+    # One prepared statement and one transaction for the whole batch
+    conn.executemany(
+        "INSERT OR REPLACE INTO taxi_zones (location_id, borough, zone_name, service_zone) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    # Rebuild the zone-name FTS index from the rows just loaded
+    conn.execute("INSERT INTO zone_fts(zone_fts) VALUES ('rebuild')")
     conn.commit()
-    print(f"Loaded {len(zones_df)} taxi zones.")
+    print(f"Loaded {len(zones)} taxi zones.")
 
 
 def load_spatial_data(conn):
@@ -58,6 +58,7 @@ def load_spatial_data(conn):
     print("Loading spatial data...")
     try:
         import geopandas as gpd
+        import shapely
 
         shp_path = os.path.join(DATA_DIR, "taxi_zones", "taxi_zones.shp")
         gdf = gpd.read_file(shp_path)
@@ -65,18 +66,17 @@ def load_spatial_data(conn):
         # Convert to WGS84 (lat/lon) for web mapping
         gdf = gdf.to_crs(epsg=4326)
 
-        count = 0
-        for _, row in gdf.iterrows():
-            loc_id = int(row["LocationID"]) if "LocationID" in row else int(row["OBJECTID"])
-            geom_json = row["geometry"].__geo_interface__
-            conn.execute(
-                "INSERT OR REPLACE INTO taxi_zone_geometries (location_id, geometry_json) VALUES (?, ?)",
-                (loc_id, json.dumps(geom_json)),
-            )
-            count += 1
+        id_col = "LocationID" if "LocationID" in gdf.columns else "OBJECTID"
+        # Serialize every geometry in one vectorized GEOS call
+        geoms_json = shapely.to_geojson(gdf.geometry.to_numpy())
+        rows = list(zip(gdf[id_col].astype(int).tolist(), geoms_json.tolist()))
 
+        conn.executemany(
+            "INSERT OR REPLACE INTO taxi_zone_geometries (location_id, geometry_json) VALUES (?, ?)",
+            rows,
+        )
         conn.commit()
-        print(f"Loaded {count} zone geometries.")
+        print(f"Loaded {len(rows)} zone geometries.")
     except Exception as e:
         print(f"Warning: Could not load spatial data: {e}")
         print("Continuing without spatial data...")
@@ -95,12 +95,14 @@ def main():
 
     setup_database()
     conn = sqlite3.connect(DB_PATH)
+    apply_bulk_pragmas(conn)
     log_file = open(LOG_PATH, "w")
 
     try:
         load_taxi_zones(conn)
         load_spatial_data(conn)
         clean_and_process_trips(conn, log_file)
+        refresh_caches(conn)
     finally:
         log_file.close()
         conn.close()
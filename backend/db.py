@@ -3,12 +3,27 @@ Database connection module for NYC Taxi Data Explorer.
 """
 import sqlite3
 import os
+import threading
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nyc_taxi.db")
 
+# One connection per worker thread, reused across requests
+_local = threading.local()
+
 
 def get_db():
-    """Get a database connection with row factory enabled."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get this thread's database connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # Read-mostly workload: WAL lets readers run concurrently, and a
+        # large page cache + mmap keep hot pages out of the syscall path
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _local.conn = conn
     return conn
+
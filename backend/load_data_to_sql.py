@@ -1,7 +1,7 @@
 """
 Load Cleaned Data into SQLite
 ------------------------------
-Run pipeline.py first to generate processed/cleaned_trips.csv.
+Run pipeline.py first to generate processed/cleaned_trips.parquet.
 Then run this script to populate the SQLite database.
 
 Usage:
@@ -10,16 +10,93 @@ Usage:
 """
 
 import sqlite3
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import os
 import json
+import orjson
+from itertools import chain, islice
 
-BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
-DB_PATH       = os.path.join(BASE_DIR, "nyc_taxi.db")
-SCHEMA_PATH   = os.path.join(BASE_DIR, "schema.sql")
-PROCESSED_CSV = os.path.join(BASE_DIR, "processed", "cleaned_trips.csv")
-ZONES_CSV     = os.path.join(BASE_DIR, "..", "data", "taxi_zone_lookup.csv")
-GEOJSON_PATH  = os.path.join(BASE_DIR, "processed", "taxi_zones.geojson")
+from zones import load_zone_lookup
+
+BASE_DIR          = os.path.dirname(os.path.abspath(__file__))
+DB_PATH           = os.path.join(BASE_DIR, "nyc_taxi.db")
+SCHEMA_PATH       = os.path.join(BASE_DIR, "schema.sql")
+PROCESSED_PARQUET = os.path.join(BASE_DIR, "processed", "cleaned_trips.parquet")
+GEOJSON_PATH      = os.path.join(BASE_DIR, "processed", "taxi_zones.geojson")
+
+TRIP_BATCH_ROWS = 50_000
+
+# Parquet column -> trips column
+TRIP_COLUMNS = {
+    "VendorID":              "vendor_id",
+    "tpep_pickup_datetime":  "pickup_datetime",
+    "tpep_dropoff_datetime": "dropoff_datetime",
+    "passenger_count":       "passenger_count",
+    "trip_distance":         "trip_distance",
+    "RatecodeID":            "rate_code_id",
+    "store_and_fwd_flag":    "store_and_fwd_flag",
+    "PULocationID":          "pickup_location_id",
+    "DOLocationID":          "dropoff_location_id",
+    "payment_type":          "payment_type",
+    "fare_amount":           "fare_amount",
+    "extra":                 "extra",
+    "mta_tax":               "mta_tax",
+    "tip_amount":            "tip_amount",
+    "tolls_amount":          "tolls_amount",
+    "improvement_surcharge": "improvement_surcharge",
+    "total_amount":          "total_amount",
+    "trip_duration_min":     "trip_duration_minutes",
+    "avg_speed_mph":         "speed_mph",
+    "fare_per_mile":         "fare_per_mile",
+    "pickup_hour":           "pickup_hour",
+    "pickup_day_of_week":    "pickup_day_of_week",
+}
+
+# Trips are inserted TRIP_ROWS_PER_INSERT rows per multi-row VALUES
+# statement, which SQLite steps once instead of once per row. SQLite
+# before 3.32 caps a statement at 999 bound parameters.
+MAX_SQL_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+TRIP_ROWS_PER_INSERT = min(500, MAX_SQL_PARAMS // len(TRIP_COLUMNS))
+
+
+def trip_insert_sql(nrows):
+    """INSERT for nrows trips; columns missing from the Parquet file bind as NULL."""
+    row = f"({', '.join('?' * len(TRIP_COLUMNS))})"
+    return (
+        f"INSERT INTO trips ({', '.join(TRIP_COLUMNS.values())}) "
+        f"VALUES {', '.join([row] * nrows)}"
+    )
+
+
+# Prepared once by sqlite3 and re-bound for every full block of rows
+INSERT_TRIP_SQL = trip_insert_sql(TRIP_ROWS_PER_INSERT)
+
+
+def insert_trip_rows(cur, rows):
+    """Insert row tuples in blocks of TRIP_ROWS_PER_INSERT; the tail gets its own statement."""
+    rows = iter(rows)
+    while block := list(islice(rows, TRIP_ROWS_PER_INSERT)):
+        sql = INSERT_TRIP_SQL if len(block) == TRIP_ROWS_PER_INSERT else trip_insert_sql(len(block))
+        cur.execute(sql, list(chain.from_iterable(block)))
+
+
+# Bulk-load settings: WAL + NORMAL sync avoid an fsync per commit, and a
+# large page cache / mmap window keeps index building in memory
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+]
+
+
+def apply_bulk_pragmas(conn):
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
 
 
 def create_tables(conn):
@@ -32,86 +109,203 @@ def create_tables(conn):
 
 def load_zones(conn):
     print("Loading taxi zones...")
-    zones = pd.read_csv(ZONES_CSV)
-    zones.columns = [c.strip() for c in zones.columns]
-
-    for _, row in zones.iterrows():
-        conn.execute(
-            """INSERT OR IGNORE INTO taxi_zones (location_id, borough, zone_name, service_zone)
-               VALUES (?, ?, ?, ?)""",
-            (int(row["LocationID"]), str(row["Borough"]),
-             str(row["Zone"]), str(row["service_zone"]))
-        )
+    # Fill/cast whole columns once, then bind every row in one executemany
+    zones = load_zone_lookup().astype({"LocationID": int}).fillna("Unknown")
+    conn.executemany(
+        """INSERT OR IGNORE INTO taxi_zones (location_id, borough, zone_name, service_zone)
+           VALUES (?, ?, ?, ?)""",
+        zones.itertuples(index=False, name=None),
+    )
 
     # Load GeoJSON geometries if available
     if os.path.exists(GEOJSON_PATH):
         with open(GEOJSON_PATH) as f:
             gj = json.load(f)
-        for feature in gj.get("features", []):
-            loc_id = feature["properties"].get("LocationID")
-            geom   = json.dumps(feature["geometry"])
-            if loc_id:
-                conn.execute(
-                    """INSERT OR IGNORE INTO taxi_zone_geometries (location_id, geometry_json)
-                       VALUES (?, ?)""",
-                    (int(loc_id), geom)
-                )
+        geoms = [
+            (int(feature["properties"]["LocationID"]), json.dumps(feature["geometry"]))
+            for feature in gj.get("features", [])
+            if feature["properties"].get("LocationID")
+        ]
+        conn.executemany(
+            """INSERT OR IGNORE INTO taxi_zone_geometries (location_id, geometry_json)
+               VALUES (?, ?)""",
+            geoms,
+        )
 
+    # Rebuild the zone-name FTS index from the rows just loaded
+    conn.execute("INSERT INTO zone_fts(zone_fts) VALUES ('rebuild')")
     conn.commit()
     print(f"  Loaded {conn.execute('SELECT COUNT(*) FROM taxi_zones').fetchone()[0]} zones.")
 
 
 def load_trips(conn):
     print("Loading trips...")
-    if not os.path.exists(PROCESSED_CSV):
-        print("  ERROR: processed/cleaned_trips.csv not found. Run pipeline.py first.")
+    if not os.path.exists(PROCESSED_PARQUET):
+        print("  ERROR: processed/cleaned_trips.parquet not found. Run pipeline.py first.")
         return
 
-    trips = pd.read_csv(PROCESSED_CSV)
-
-    # Rename columns to match schema
-    col_map = {
-        "VendorID":              "vendor_id",
-        "tpep_pickup_datetime":  "pickup_datetime",
-        "tpep_dropoff_datetime": "dropoff_datetime",
-        "passenger_count":       "passenger_count",
-        "trip_distance":         "trip_distance",
-        "RatecodeID":            "rate_code_id",
-        "store_and_fwd_flag":    "store_and_fwd_flag",
-        "PULocationID":          "pickup_location_id",
-        "DOLocationID":          "dropoff_location_id",
-        "payment_type":          "payment_type",
-        "fare_amount":           "fare_amount",
-        "extra":                 "extra",
-        "mta_tax":               "mta_tax",
-        "tip_amount":            "tip_amount",
-        "tolls_amount":          "tolls_amount",
-        "improvement_surcharge": "improvement_surcharge",
-        "total_amount":          "total_amount",
-        "trip_duration_min":     "trip_duration_minutes",
-        "avg_speed_mph":         "speed_mph",
-        "fare_per_mile":         "fare_per_mile",
-        "pickup_hour":           "pickup_hour",
-        "pickup_day_of_week":    "pickup_day_of_week",
-        "is_weekend":            "is_weekend",
-    }
-    trips = trips.rename(columns=col_map)
-
-    keep = [v for v in col_map.values() if v in trips.columns]
-    trips = trips[keep]
-
-    trips.to_sql("trips", conn, if_exists="append", index=False, chunksize=5000)
-    conn.commit()
+    # Stream only the mapped columns in Arrow batches; no DataFrame is built
+    # and at most one batch of Python row values is alive at a time
+    pf = pq.ParquetFile(PROCESSED_PARQUET)
+    source = [c for c in TRIP_COLUMNS if c in pf.schema_arrow.names]
+
+    # Open the transaction by hand: sqlite3 only begins implicitly before
+    # DML, so DROP INDEX would otherwise autocommit and a failed load would
+    # leave trips without its indexes. Index drop, inserts and rebuild now
+    # commit (or roll back) together.
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        with conn:
+            conn.execute("BEGIN")
+
+            # Drop the trip indexes during the load and rebuild each one in a
+            # single pass afterwards, instead of updating them row by row
+            indexes = conn.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = 'trips' AND sql IS NOT NULL"
+            ).fetchall()
+            for name, _ in indexes:
+                conn.execute(f"DROP INDEX {name}")
+
+            # Row tuples are zipped from the batch columns; NaN binds as NULL
+            cur = conn.cursor()
+            for batch in pf.iter_batches(batch_size=TRIP_BATCH_ROWS, columns=source):
+                # Store timestamps as the same "YYYY-MM-DD HH:MM:SS" text as
+                # before, formatted per column rather than per row
+                columns = []
+                for src, name in TRIP_COLUMNS.items():
+                    if src not in source:
+                        columns.append([None] * batch.num_rows)
+                        continue
+                    col = batch.column(src)
+                    if name in ("pickup_datetime", "dropoff_datetime"):
+                        col = pc.strftime(col.cast(pa.timestamp("s"), safe=False),
+                                          format="%Y-%m-%d %H:%M:%S")
+                    columns.append(col.to_pylist())
+                insert_trip_rows(cur, zip(*columns))
+
+            for _, sql in indexes:
+                conn.execute(sql)
+    finally:
+        conn.isolation_level = isolation_level
 
     total = conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0]
     print(f"  Loaded {total:,} trips into SQLite.")
 
+    # Gather index statistics so the query planner picks the filter indexes
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+# Each aggregate endpoint in app.py reads one of these tables instead of
+# scanning trips per request. Queries mirror the ones the endpoints used to run;
+# averages and sums are rounded here so the endpoints can return rows as-is.
+CACHE_QUERIES = {
+    "stats_cache": """
+        SELECT COUNT(*),
+            ROUND(AVG(trip_distance), 2), ROUND(AVG(trip_duration_minutes), 2),
+            ROUND(AVG(fare_amount), 2), ROUND(AVG(speed_mph), 2),
+            ROUND(AVG(tip_amount), 2), ROUND(AVG(total_amount), 2),
+            ROUND(SUM(total_amount), 2), ROUND(AVG(passenger_count), 2),
+            -- DISTINCT subquery walks idx_trips_pickup_location instead of
+            -- building a temp b-tree alongside the aggregate scan
+            (SELECT COUNT(*) FROM (SELECT DISTINCT pickup_location_id FROM trips))
+        FROM trips""",
+    "hourly_agg": """
+        SELECT pickup_hour, COUNT(*), ROUND(AVG(fare_amount), 2),
+            ROUND(AVG(trip_duration_minutes), 2), ROUND(AVG(speed_mph), 2),
+            ROUND(AVG(tip_amount), 2)
+        FROM trips
+        GROUP BY pickup_hour""",
+    "daily_agg": """
+        SELECT pickup_day_of_week, COUNT(*), ROUND(AVG(fare_amount), 2),
+            ROUND(AVG(trip_distance), 2),
+            SUM(CASE WHEN is_weekend = 1 THEN 1 ELSE 0 END)
+        FROM trips
+        GROUP BY pickup_day_of_week""",
+    "borough_agg": """
+        SELECT z.borough, COUNT(*), ROUND(AVG(t.fare_amount), 2),
+            ROUND(AVG(t.trip_distance), 2), ROUND(AVG(t.trip_duration_minutes), 2),
+            ROUND(AVG(t.speed_mph), 2), ROUND(AVG(t.tip_amount), 2),
+            ROUND(SUM(t.total_amount), 2)
+        FROM trips t
+        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
+        GROUP BY z.borough""",
+    "fare_dist_agg": """
+        SELECT CAST(fare_amount / 5 AS INT) * 5, COUNT(*), ROUND(AVG(fare_amount), 2)
+        FROM trips
+        WHERE fare_amount > 0 AND fare_amount <= 100
+        GROUP BY CAST(fare_amount / 5 AS INT)""",
+    "payment_agg": """
+        SELECT payment_type, COUNT(*), ROUND(AVG(fare_amount), 2),
+            ROUND(AVG(tip_amount), 2), ROUND(SUM(total_amount), 2)
+        FROM trips
+        GROUP BY payment_type""",
+    "weekday_weekend_agg": """
+        SELECT CASE WHEN is_weekend = 1 THEN 'Weekend' ELSE 'Weekday' END,
+            COUNT(*), ROUND(AVG(fare_amount), 2), ROUND(AVG(trip_distance), 2),
+            ROUND(AVG(trip_duration_minutes), 2), ROUND(AVG(speed_mph), 2),
+            ROUND(AVG(tip_amount), 2)
+        FROM trips
+        GROUP BY is_weekend""",
+    "speed_agg": """
+        SELECT z.borough, t.pickup_hour, ROUND(AVG(t.speed_mph), 2), COUNT(*)
+        FROM trips t
+        JOIN taxi_zones z ON t.pickup_location_id = z.location_id
+        WHERE z.borough IN ('Manhattan', 'Brooklyn', 'Queens', 'Bronx')
+        GROUP BY z.borough, t.pickup_hour""",
+}
+
+
+def store_zones_geojson(conn):
+    """Encode the zones FeatureCollection once and store it in static_json."""
+    rows = conn.execute(
+        """SELECT g.location_id, g.geometry_json, z.zone_name, z.borough, z.service_zone
+        FROM taxi_zone_geometries g
+        JOIN taxi_zones z ON g.location_id = z.location_id"""
+    ).fetchall()
+
+    features = [
+        {
+            "type": "Feature",
+            "properties": {
+                "location_id": loc_id,
+                "zone_name": zone_name,
+                "borough": borough,
+                "service_zone": service_zone,
+            },
+            "geometry": orjson.loads(geometry_json),
+        }
+        for loc_id, geometry_json, zone_name, borough, service_zone in rows
+    ]
+    body = orjson.dumps({"type": "FeatureCollection", "features": features})
+
+    conn.execute(
+        "INSERT OR REPLACE INTO static_json (name, body) VALUES ('zones_geojson', ?)",
+        (body,),
+    )
+    return len(features)
+
+
+def refresh_caches(conn):
+    """Rebuild the precomputed aggregate tables and static JSON bodies."""
+    print("Refreshing aggregate caches...")
+    for table, query in CACHE_QUERIES.items():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} {query}")
+    zone_count = store_zones_geojson(conn)
+    conn.commit()
+    print(f"  Refreshed {len(CACHE_QUERIES)} cache tables and {zone_count} zone geometries.")
+
 
 def main():
     conn = sqlite3.connect(DB_PATH)
+    apply_bulk_pragmas(conn)
     create_tables(conn)
     load_zones(conn)
     load_trips(conn)
+    refresh_caches(conn)
     conn.close()
     print("Database ready.")
 
@@ -2,18 +2,27 @@
 Data Pipeline for NYC Taxi Data Explorer
 -----------------------------------------
 Loads, cleans, and enriches raw TLC trip records.
-Output is saved to processed/cleaned_trips.csv and used by load_data_to_sql.py.
+Output is saved to processed/cleaned_trips.parquet and used by load_data_to_sql.py.
 
 Steps:
     1. load_data        — read raw CSV and zone lookup
     2. clean_trips      — remove nulls, duplicates, and out-of-range rows
     3. engineer_features — add duration, speed, fare-per-mile columns
     4. integrate_lookup  — join zone names and boroughs onto trips
-    5. save_output       — write cleaned_trips.csv to processed/
+    5. save_output       — write cleaned_trips.parquet to processed/
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import csv
 import os
+from datetime import datetime
+
+from zones import load_zone_lookup
 
 # ── Paths ──────────────────────────────────────────────────────────────────────
 BASE_DIR       = os.path.dirname(os.path.abspath(__file__))
@@ -23,17 +32,155 @@ LOG_DIR        = os.path.join(BASE_DIR, "logs")
 
 PARQUET_PATH     = os.path.join(DATA_DIR, "yellow_tripdata_2019-01.parquet")
 CSV_PATH         = os.path.join(DATA_DIR, "yellow_tripdata_2019-01.csv")
-ZONE_LOOKUP_PATH = os.path.join(DATA_DIR, "taxi_zone_lookup.csv")
 
 REQUIRED_COLUMNS = {"tpep_pickup_datetime", "tpep_dropoff_datetime",
                     "PULocationID", "DOLocationID", "fare_amount", "trip_distance"}
 
+SAMPLE_ROWS = 600_000
+
+# Trips outside the sample month are dropped while reading
+MONTH_START = datetime(2019, 1, 1)
+MONTH_END   = datetime(2019, 2, 1)
+
+# Typed Arrow schema for the raw TLC columns the pipeline carries through.
+# Doubles as the read projection: columns the loader never stores are left out.
+TRIP_SCHEMA = {
+    "VendorID":              pa.int32(),
+    "tpep_pickup_datetime":  pa.timestamp("s"),
+    "tpep_dropoff_datetime": pa.timestamp("s"),
+    "passenger_count":       pa.float64(),
+    "trip_distance":         pa.float64(),
+    "RatecodeID":            pa.float64(),
+    "store_and_fwd_flag":    pa.string(),
+    "PULocationID":          pa.int32(),
+    "DOLocationID":          pa.int32(),
+    "payment_type":          pa.int32(),
+    "fare_amount":           pa.float64(),
+    "extra":                 pa.float64(),
+    "mta_tax":               pa.float64(),
+    "tip_amount":            pa.float64(),
+    "tolls_amount":          pa.float64(),
+    "improvement_surcharge": pa.float64(),
+    "total_amount":          pa.float64(),
+}
+
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 os.makedirs(LOG_DIR, exist_ok=True)
 
 
 # ── STEP 1: Load ───────────────────────────────────────────────────────────────
 
+def read_trip_csv(path, nrows):
+    """
+    Read the first nrows of a raw trip CSV with Arrow's multi-threaded parser.
+    Only known trip columns are parsed, straight into their typed schema.
+    A malformed cell makes the typed parse fail, so the file is then re-read
+    with read_trip_csv_lenient instead.
+    """
+    with open(path, newline="") as f:
+        header = next(csv.reader(f))
+    columns = [c for c in TRIP_SCHEMA if c in header]
+
+    # Parse straight out of the page cache instead of copying the file
+    # through read() buffers; only the blocks actually scanned are touched
+    try:
+        with pa.memory_map(path, "r") as source:
+            reader = pacsv.open_csv(
+                source,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=16 << 20),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=columns,
+                    column_types={c: TRIP_SCHEMA[c] for c in columns},
+                    strings_can_be_null=True,   # blank flags -> null, as pd.read_csv did
+                ),
+            )
+            # Same month filter the Parquet scan pushes down, applied per batch
+            # with Arrow kernels so only in-month rows reach pandas
+            batches = (batch.filter(in_month_mask(batch)) for batch in reader)
+            return take_rows(batches, reader.schema, nrows)
+    except pa.ArrowInvalid as e:
+        print(f"  Typed CSV parse failed ({e}).")
+        print("  Re-reading with lenient parsing (unparseable values become null)...")
+        return read_trip_csv_lenient(path, columns, nrows)
+
+
+def read_trip_csv_lenient(path, columns, nrows):
+    """
+    Slow path for CSVs with malformed cells: read as text in chunks and coerce,
+    like pd.to_datetime / pd.to_numeric(errors="coerce"). Rows whose timestamps
+    do not parse fail the month filter, as in the typed path.
+    """
+    kept, rows = [], 0
+    for chunk in pd.read_csv(path, usecols=columns, dtype=str, chunksize=100_000):
+        for col in columns:
+            if col in ("tpep_pickup_datetime", "tpep_dropoff_datetime"):
+                chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+            elif col != "store_and_fwd_flag":
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+
+        pickup = chunk["tpep_pickup_datetime"]
+        chunk = chunk.loc[
+            (pickup >= MONTH_START) & (pickup < MONTH_END) &
+            chunk["tpep_dropoff_datetime"].notna()
+        ]
+        kept.append(chunk)
+        rows += len(chunk)
+        if rows >= nrows:
+            break
+
+    return pd.concat(kept, ignore_index=True).head(nrows)
+
+
+def in_month_mask(batch):
+    """Arrow mask: pickup within the sample month and dropoff present."""
+    pickup = batch.column("tpep_pickup_datetime")
+    return pc.and_(
+        pc.and_(pc.greater_equal(pickup, MONTH_START), pc.less(pickup, MONTH_END)),
+        pc.is_valid(batch.column("tpep_dropoff_datetime")),
+    )
+
+
+def read_trip_parquet(path, nrows):
+    """
+    Read the first nrows Jan-2019 trips of a raw trip Parquet file, batch by batch.
+    Only known trip columns are decoded, and reading stops at nrows.
+    """
+    dataset = ds.dataset(path, format="parquet")
+    columns = [c for c in TRIP_SCHEMA if c in dataset.schema.names]
+
+    # clean_trips' first-stage filter, pushed into the scan so row groups
+    # whose pickup statistics fall outside the month are never decoded.
+    # The trip-level checks stay after dedup, as they must.
+    pickup = ds.field("tpep_pickup_datetime")
+    in_month = (
+        (pickup >= MONTH_START) &
+        (pickup <  MONTH_END) &
+        ds.field("tpep_dropoff_datetime").is_valid()
+    )
+    # Keep readahead to one batch: take_rows stops at nrows, and the scanner's
+    # default readahead would otherwise decode up to 16 batches past that
+    batches = dataset.to_batches(
+        columns=columns, filter=in_month, batch_size=64_000, batch_readahead=1,
+    )
+    return take_rows(batches, dataset.schema, nrows, columns)
+
+
+def take_rows(batches, schema, nrows, columns=None):
+    """Collect record batches until nrows are in hand, then convert to pandas."""
+    if columns is not None:
+        schema = pa.schema([schema.field(c) for c in columns])
+
+    taken, rows = [], 0
+    for batch in batches:
+        taken.append(batch)
+        rows += batch.num_rows
+        if rows >= nrows:
+            break
+
+    table = pa.Table.from_batches(taken, schema=schema).slice(0, nrows)
+    return table.to_pandas(self_destruct=True, split_blocks=True)
+
+
 def load_data():
     print("Loading datasets...")
 
@@ -42,11 +189,10 @@ def load_data():
     # Try parquet first (smaller, faster), fall back to CSV
     if os.path.exists(PARQUET_PATH):
         print("  Reading parquet file...")
-        trips = pd.read_parquet(PARQUET_PATH)
-        trips = trips.head(600_000)
+        trips = read_trip_parquet(PARQUET_PATH, SAMPLE_ROWS)
     elif os.path.exists(CSV_PATH):
         print("  Reading CSV file...")
-        trips = pd.read_csv(CSV_PATH, nrows=600_000)
+        trips = read_trip_csv(CSV_PATH, SAMPLE_ROWS)
     else:
         print("\n  ERROR: No trip data file found.")
         print("  Download one of:")
@@ -64,7 +210,7 @@ def load_data():
         print("  Re-download using the curl command in the README.")
         return None, None
 
-    zone_lookup = pd.read_csv(ZONE_LOOKUP_PATH)
+    zone_lookup = load_zone_lookup()
 
     print(f"  Loaded {len(trips):,} trip rows and {len(zone_lookup):,} zone records.")
     return trips, zone_lookup
@@ -76,42 +222,54 @@ def clean_trips(trips):
     print("Cleaning trip data...")
     original = len(trips)
 
-    # Parse datetimes
-    trips["tpep_pickup_datetime"]  = pd.to_datetime(trips["tpep_pickup_datetime"],  errors="coerce")
-    trips["tpep_dropoff_datetime"] = pd.to_datetime(trips["tpep_dropoff_datetime"], errors="coerce")
-    trips = trips.dropna(subset=["tpep_pickup_datetime", "tpep_dropoff_datetime"])
+    # Timestamps arrive typed from both readers, which also keep only
+    # Jan-2019 trips with a dropoff time (in_month_mask / the Parquet scan
+    # filter), so there is no timestamp stage here.
 
-    # Keep only Jan 2019
-    trips = trips[
-        (trips["tpep_pickup_datetime"] >= "2019-01-01") &
-        (trips["tpep_pickup_datetime"] <  "2019-02-01")
-    ]
-
-    # Remove duplicates
+    # Remove duplicates; this runs before the trip-level checks
+    before = len(trips)
     trips = trips.drop_duplicates(subset=[
         "VendorID", "tpep_pickup_datetime", "tpep_dropoff_datetime",
         "PULocationID", "DOLocationID"
     ])
-
-    # Calculate trip duration in minutes
-    trips["trip_duration_min"] = (
-        (trips["tpep_dropoff_datetime"] - trips["tpep_pickup_datetime"])
-        .dt.total_seconds() / 60
-    ).round(2)
-
-    # Logical filters
-    trips = trips[trips["trip_duration_min"] > 0]
-    trips = trips[trips["trip_duration_min"] < 600]
-    trips = trips[trips["trip_distance"]     > 0]
-    trips = trips[trips["fare_amount"]       > 0]
+    excluded = {"Duplicate": before - len(trips)}
+
+    # Trip duration in minutes, straight from the timestamp arrays
+    elapsed = (
+        trips["tpep_dropoff_datetime"].to_numpy() - trips["tpep_pickup_datetime"].to_numpy()
+    )
+    duration = np.round(elapsed / np.timedelta64(1, "s") / 60, 2)
+
+    # Trip-level checks. Each row gets the code of the first rule it
+    # fails (-1 if none), so per-rule counts add up to the rows removed;
+    # one slice applies them all and adds the duration column
+    checks = {
+        "Duration <= 0":   duration > 0,
+        "Duration >= 10h": duration < 600,
+        "Distance <= 0":   trips["trip_distance"].to_numpy() > 0,
+        "Fare <= 0":       trips["fare_amount"].to_numpy()   > 0,
+        # trips.pickup/dropoff_location_id are NOT NULL
+        "Missing location": (trips["PULocationID"].notna() &
+                             trips["DOLocationID"].notna()).to_numpy(),
+    }
+    codes = np.select([~ok for ok in checks.values()], range(len(checks)), default=-1)
+    keep = codes == -1
+    counts = np.bincount(codes[~keep], minlength=len(checks))
+    excluded.update(zip(checks, counts.tolist()))
+    trips = trips.loc[keep].assign(trip_duration_min=duration[keep])
 
     removed = original - len(trips)
     print(f"  Kept {len(trips):,} rows (removed {removed:,}).")
 
+    # Rows outside Jan 2019 or without a dropoff never reach this point:
+    # the readers skip them (pushed into the Parquet scan), so they are not
+    # counted here and the sample is the first SAMPLE_ROWS in-month trips
     with open(os.path.join(LOG_DIR, "cleaning_log.txt"), "w") as f:
-        f.write(f"Original rows : {original}\n")
+        f.write(f"In-month rows : {original}\n")
         f.write(f"Cleaned rows  : {len(trips)}\n")
         f.write(f"Removed rows  : {removed}\n")
+        for reason, count in excluded.items():
+            f.write(f"  {reason:<17}: {count}\n")
 
     return trips, original, removed
 
@@ -121,26 +279,27 @@ def clean_trips(trips):
 def engineer_features(trips):
     print("Engineering features...")
 
-    trips["avg_speed_mph"] = (
-        trips["trip_distance"] / (trips["trip_duration_min"] / 60)
-    ).round(2)
+    distance = trips["trip_distance"].to_numpy()
+    speed = np.round(distance / (trips["trip_duration_min"].to_numpy() / 60), 2)
 
     # Remove unrealistic speeds
-    before = len(trips)
-    trips = trips[
-        (trips["avg_speed_mph"] >= 1) &
-        (trips["avg_speed_mph"] <= 80)
-    ].copy()
-    speed_removed = before - len(trips)
-
-    trips["fare_per_mile"] = (
-        trips["fare_amount"] / trips["trip_distance"]
-    ).round(2)
-
-    # Time features
-    trips["pickup_hour"]        = trips["tpep_pickup_datetime"].dt.hour
-    trips["pickup_day_of_week"] = trips["tpep_pickup_datetime"].dt.dayofweek
-    trips["is_weekend"]         = trips["pickup_day_of_week"].isin([5, 6]).astype(int)
+    keep = (speed >= 1) & (speed <= 80)
+    speed_removed = int((~keep).sum())
+
+    # Slice once, then derive every feature column in a single assign
+    # (no separate .copy() of the filtered frame)
+    trips = trips.loc[keep]
+
+    # Hour and weekday both come from one hours-since-epoch array
+    # (1970-01-01 was a Thursday, dayofweek 3)
+    hours = trips["tpep_pickup_datetime"].to_numpy().astype("datetime64[h]").astype(np.int64)
+    trips = trips.assign(
+        avg_speed_mph=speed[keep],
+        fare_per_mile=np.round(trips["fare_amount"].to_numpy() / distance[keep], 2),
+        # Time features
+        pickup_hour=(hours % 24).astype(np.int32),
+        pickup_day_of_week=((hours // 24 + 3) % 7).astype(np.int32),
+    )
 
     print(f"  Removed {speed_removed:,} rows with unrealistic speed.")
 
@@ -156,21 +315,34 @@ def engineer_features(trips):
 def integrate_lookup(trips, zone_lookup):
     print("Integrating zone lookup...")
 
-    trips = trips.merge(
-        zone_lookup, left_on="PULocationID", right_on="LocationID", how="left"
-    ).rename(columns={
-        "Borough": "PU_Borough", "Zone": "PU_Zone", "service_zone": "PU_ServiceZone"
-    }).drop(columns=["LocationID"])
-
-    trips = trips.merge(
-        zone_lookup, left_on="DOLocationID", right_on="LocationID", how="left"
-    ).rename(columns={
-        "Borough": "DO_Borough", "Zone": "DO_Zone", "service_zone": "DO_ServiceZone"
-    }).drop(columns=["LocationID"])
-
-    for col in ["PU_Borough", "PU_Zone", "PU_ServiceZone",
-                "DO_Borough", "DO_Zone", "DO_ServiceZone"]:
-        trips[col] = trips[col].fillna("Unknown")
+    # LocationID is a small dense integer domain, so each zone attribute
+    # becomes an array indexed by id; ids outside it map to "Unknown"
+    ids  = zone_lookup["LocationID"].to_numpy()
+    size = int(ids.max()) + 1
+    by_id = {}
+    for col in ["Borough", "Zone", "service_zone"]:
+        arr = np.full(size, "Unknown", dtype=object)
+        arr[ids] = zone_lookup[col].fillna("Unknown").to_numpy()
+        by_id[col] = arr
+
+    def lookup(loc, col):
+        # A null id turns the column float (or nullable Int64); read it as
+        # float64 so nulls become NaN, which fails both bounds below
+        loc   = loc.to_numpy(dtype=np.float64, na_value=np.nan)
+        known = (loc >= 0) & (loc < size)
+        out   = np.full(len(loc), "Unknown", dtype=object)
+        out[known] = by_id[col][loc[known].astype(np.intp)]
+        return out
+
+    pu, do = trips["PULocationID"], trips["DOLocationID"]
+    trips = trips.assign(
+        PU_Borough=lookup(pu, "Borough"),
+        PU_Zone=lookup(pu, "Zone"),
+        PU_ServiceZone=lookup(pu, "service_zone"),
+        DO_Borough=lookup(do, "Borough"),
+        DO_Zone=lookup(do, "Zone"),
+        DO_ServiceZone=lookup(do, "service_zone"),
+    )
 
     print("  Zone lookup done.")
     return trips
@@ -179,8 +351,9 @@ def integrate_lookup(trips, zone_lookup):
 # ── STEP 5: Save ──────────────────────────────────────────────────────────────
 
 def save_output(trips):
-    out = os.path.join(PROCESSED_DIR, "cleaned_trips.csv")
-    trips.to_csv(out, index=False)
+    # Parquet keeps dtypes, so the loader skips re-parsing numbers and dates
+    out = os.path.join(PROCESSED_DIR, "cleaned_trips.parquet")
+    trips.to_parquet(out, engine="pyarrow", compression="snappy", index=False)
     print(f"  Saved {len(trips):,} rows → {out}")
 
 
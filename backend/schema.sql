@@ -9,6 +9,13 @@ CREATE TABLE IF NOT EXISTS taxi_zones (
     service_zone TEXT NOT NULL
 );
 
+-- Full-text index over zone names (external content: rows live in taxi_zones)
+CREATE VIRTUAL TABLE IF NOT EXISTS zone_fts USING fts5 (
+    zone_name,
+    content = 'taxi_zones',
+    content_rowid = 'location_id'
+);
+
 -- Dimension table: Spatial data for zones (GeoJSON boundaries)
 CREATE TABLE IF NOT EXISTS taxi_zone_geometries (
     location_id INTEGER PRIMARY KEY,
@@ -43,7 +50,8 @@ CREATE TABLE IF NOT EXISTS trips (
     fare_per_mile REAL,
     pickup_hour INTEGER,
     pickup_day_of_week INTEGER,
-    is_weekend INTEGER,
+    -- Computed on read from pickup_day_of_week (5 = Sat, 6 = Sun), not stored
+    is_weekend INTEGER GENERATED ALWAYS AS (pickup_day_of_week >= 5) VIRTUAL,
     FOREIGN KEY (pickup_location_id) REFERENCES taxi_zones (location_id),
     FOREIGN KEY (dropoff_location_id) REFERENCES taxi_zones (location_id)
 );
@@ -66,4 +74,92 @@ CREATE INDEX IF NOT EXISTS idx_trips_borough_pickup ON trips (
 
 CREATE INDEX IF NOT EXISTS idx_trips_fare ON trips (fare_amount);
 
-CREATE INDEX IF NOT EXISTS idx_trips_distance ON trips (trip_distance);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_trips_distance ON trips (trip_distance);
+
+CREATE INDEX IF NOT EXISTS idx_trips_payment ON trips (payment_type);
+
+-- Borough filter + newest-first ordering on /api/trips
+CREATE INDEX IF NOT EXISTS idx_trips_pickup_loc_dt ON trips (
+    pickup_location_id,
+    pickup_datetime DESC
+);
+
+-- Pre-encoded JSON response bodies (e.g. the zones FeatureCollection)
+CREATE TABLE IF NOT EXISTS static_json (
+    name TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+
+-- Precomputed aggregates (filled by refresh_caches after each load)
+CREATE TABLE IF NOT EXISTS stats_cache (
+    total_trips INTEGER,
+    avg_distance REAL,
+    avg_duration REAL,
+    avg_fare REAL,
+    avg_speed REAL,
+    avg_tip REAL,
+    avg_total REAL,
+    total_revenue REAL,
+    avg_passengers REAL,
+    active_zones INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS hourly_agg (
+    hour INTEGER PRIMARY KEY,
+    trip_count INTEGER,
+    avg_fare REAL,
+    avg_duration REAL,
+    avg_speed REAL,
+    avg_tip REAL
+);
+
+CREATE TABLE IF NOT EXISTS daily_agg (
+    day INTEGER PRIMARY KEY,
+    trip_count INTEGER,
+    avg_fare REAL,
+    avg_distance REAL,
+    weekend_trips INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS borough_agg (
+    borough TEXT PRIMARY KEY,
+    trip_count INTEGER,
+    avg_fare REAL,
+    avg_distance REAL,
+    avg_duration REAL,
+    avg_speed REAL,
+    avg_tip REAL,
+    total_revenue REAL
+);
+
+CREATE TABLE IF NOT EXISTS fare_dist_agg (
+    bucket_start INTEGER PRIMARY KEY,
+    count INTEGER,
+    avg_fare REAL
+);
+
+CREATE TABLE IF NOT EXISTS payment_agg (
+    payment_type INTEGER,            -- NULL group kept, so no PRIMARY KEY
+    trip_count INTEGER,
+    avg_fare REAL,
+    avg_tip REAL,
+    total_revenue REAL
+);
+
+CREATE TABLE IF NOT EXISTS weekday_weekend_agg (
+    period TEXT PRIMARY KEY,
+    trip_count INTEGER,
+    avg_fare REAL,
+    avg_distance REAL,
+    avg_duration REAL,
+    avg_speed REAL,
+    avg_tip REAL
+);
+
+CREATE TABLE IF NOT EXISTS speed_agg (
+    borough TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    avg_speed REAL,
+    trip_count INTEGER,
+    PRIMARY KEY (borough, hour)
+);
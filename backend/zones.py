@@ -0,0 +1,37 @@
+"""
+Taxi zone lookup shared by pipeline.py, load_data_to_sql.py and data_processing.py.
+"""
+import os
+
+import pandas as pd
+
+BASE_DIR       = os.path.dirname(os.path.abspath(__file__))
+ZONES_CSV      = os.path.join(BASE_DIR, "..", "data", "taxi_zone_lookup.csv")
+ZONES_PARQUET  = os.path.join(BASE_DIR, "processed", "zones.parquet")
+
+ZONE_DTYPES = {"LocationID": "int32", "Borough": "str", "Zone": "str", "service_zone": "str"}
+
+_zones = None
+
+
+def load_zone_lookup():
+    """
+    Get the typed zone lookup, parsing the CSV at most once.
+    The parsed frame is kept in memory for this process and in
+    processed/zones.parquet for later runs, until the CSV changes.
+    """
+    global _zones
+    if _zones is None:
+        fresh = (os.path.exists(ZONES_PARQUET)
+                 and os.path.getmtime(ZONES_PARQUET) >= os.path.getmtime(ZONES_CSV))
+        if fresh:
+            _zones = pd.read_parquet(ZONES_PARQUET)
+        else:
+            zones = pd.read_csv(ZONES_CSV)
+            zones.columns = [c.strip() for c in zones.columns]
+            # Fill before the cast: on pandas < 3, astype("str") turns NaN
+            # (the "N/A" rows) into the literal string "nan"
+            _zones = zones[list(ZONE_DTYPES)].fillna("Unknown").astype(ZONE_DTYPES)
+            os.makedirs(os.path.dirname(ZONES_PARQUET), exist_ok=True)
+            _zones.to_parquet(ZONES_PARQUET, index=False)
+    return _zones.copy()
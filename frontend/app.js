@@ -24,6 +24,7 @@ let geoLayer = null;
 // Pagination state
 let currentPage = 1;
 let totalPages = 1;
+let nextCursor = null;
 
 // =========================================
 //  Initialize everything on page load
@@ -57,7 +58,7 @@ document.addEventListener("DOMContentLoaded", function () {
 // =========================================
 //  Trip Table with Pagination
 // =========================================
-async function loadTripsTable(page) {
+async function loadTripsTable(page, cursor) {
     if (page === undefined) page = currentPage;
 
     // Build query params from filters
@@ -65,6 +66,12 @@ async function loadTripsTable(page) {
     params.set("page", page);
     params.set("per_page", 50);
 
+    // Seek from the previous page's last row instead of using OFFSET
+    if (cursor) {
+        params.set("cursor_dt", cursor.cursor_dt);
+        params.set("cursor_id", cursor.cursor_id);
+    }
+
     const borough = document.getElementById("filter-borough").value;
     if (borough) params.set("borough", borough);
 
@@ -88,6 +95,7 @@ async function loadTripsTable(page) {
 
     currentPage = data.page;
     totalPages = data.total_pages;
+    nextCursor = data.next_cursor;
 
     // Update controls
     document.getElementById("table-info").textContent =
@@ -123,7 +131,7 @@ async function loadTripsTable(page) {
 function nextPage() {
     if (currentPage < totalPages) {
         currentPage++;
-        loadTripsTable(currentPage);
+        loadTripsTable(currentPage, nextCursor);
     }
 }
 